@@ -0,0 +1,426 @@
+"""
+artifact_store.py
+O-Scan Diagnostics — Content-Addressed Artifact Store
+Names every uploaded blob by the SHA-256 of its bytes and shards it into
+nested directories (ab/cd/abcd….jpg), so directories stay small, identical
+uploads are stored once and two uploads can never overwrite each other.
+Bytes live behind a storage driver: local disk, or any S3-compatible
+object store (AWS S3, MinIO, …) shared by every web node.
+"""
+
+import hashlib
+import io
+import itertools
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+
+
+# ─────────────────────────────────────────────
+#  STORAGE DRIVERS
+# ─────────────────────────────────────────────
+
+class StorageDriver(ABC):
+    """
+    Interface behind artifact reads and writes. Keys are '/'-separated
+    relative paths such as instance/store/ab/cd/<sha256>.jpg. A driver
+    missing any abstract method fails when it is created.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def exists(self, key):
+        """True if `key` holds an object."""
+
+    @abstractmethod
+    def size(self, key):
+        """Size of `key` in bytes."""
+
+    @abstractmethod
+    def write_stream(self, key, stream):
+        """Write a file-like object to `key`, replacing any previous content."""
+
+    @abstractmethod
+    def open(self, key):
+        """Readable binary file-like object for `key`."""
+
+    @abstractmethod
+    def read_range(self, key, start, end=None):
+        """Bytes start..end (inclusive, like HTTP ranges) of `key`."""
+
+    @abstractmethod
+    def local_path(self, key):
+        """Path of a local copy, for libraries that only take file names."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove `key`; a key that does not exist is ignored."""
+
+    @abstractmethod
+    def list(self, prefix):
+        """Keys under `prefix` (a '/'-terminated directory-like prefix)."""
+
+    def url(self, key, expires_in=3600, content_type=None, download_name=None):
+        """
+        Direct download URL, or None when files are served by the app.
+        `content_type` and `download_name` set the response's headers.
+        """
+        return None
+
+
+class LocalStorageDriver(StorageDriver):
+    """Files under `base_dir` on this node's disk."""
+
+    name = "local"
+
+    def __init__(self, base_dir="."):
+        self.base_dir = base_dir
+
+    def _fs_path(self, key):
+        return os.path.join(self.base_dir, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.isfile(self._fs_path(key))
+
+    def size(self, key):
+        return os.path.getsize(self._fs_path(key))
+
+    def write_stream(self, key, stream):
+        # Write next to the target and rename, so readers never see partial blobs
+        path = self._fs_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                shutil.copyfileobj(stream, fp, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, key):
+        return open(self._fs_path(key), 'rb')
+
+    def read_range(self, key, start, end=None):
+        with self.open(key) as fp:
+            fp.seek(start)
+            return fp.read() if end is None else fp.read(end - start + 1)
+
+    def local_path(self, key):
+        return self._fs_path(key)
+
+    def delete(self, key):
+        path = self._fs_path(key)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        # Drop the directory once its last file is gone (e.g. a deleted record's reports)
+        try:
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+    def list(self, prefix):
+        keys = []
+        for directory, _, names in os.walk(self._fs_path(prefix.rstrip('/'))):
+            rel = os.path.relpath(directory, self.base_dir).replace(os.sep, '/')
+            keys.extend(f"{rel}/{name}" for name in names if not name.endswith('.part'))
+        return keys
+
+
+class S3StorageDriver(StorageDriver):
+    """
+    Objects in an S3-compatible bucket. Large writes go up as streaming
+    multipart uploads; reads can be ranged. `local_path` keeps a local copy
+    under `cache_dir` for code that needs a real file (e.g. FPDF images);
+    the least recently used copies are deleted past `cache_max_bytes`.
+    Pass `endpoint_url` to use MinIO or another S3-compatible service.
+    """
+
+    name = "s3"
+
+    # S3 rejects multipart parts smaller than 5 MB (except the last one)
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, region=None,
+                 access_key=None, secret_key=None, part_size=8 * 1024 * 1024,
+                 cache_dir=None, cache_max_bytes=512 * 1024 * 1024, client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.part_size = max(self.MIN_PART_SIZE, int(part_size))
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "oscan-artifacts")
+        self.cache_max_bytes = int(cache_max_bytes)
+
+        if client is None:
+            import boto3
+            client = boto3.client(
+                's3',
+                endpoint_url=endpoint_url or None,
+                region_name=region or None,
+                aws_access_key_id=access_key or None,
+                aws_secret_access_key=secret_key or None,
+            )
+        self.client = client
+
+    def _object_key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _head(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as e:
+            # botocore's ClientError carries the S3 error code in `response`
+            code = (getattr(e, 'response', None) or {}).get('Error', {}).get('Code')
+            if code in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(key)
+        return head['ContentLength']
+
+    def write_stream(self, key, stream):
+        object_key = self._object_key(key)
+        first = stream.read(self.part_size)
+        chunk = stream.read(self.part_size) if len(first) == self.part_size else b''
+
+        # Small objects fit in a single request
+        if not chunk:
+            self.client.put_object(Bucket=self.bucket, Key=object_key, Body=first)
+            return
+
+        upload = self.client.create_multipart_upload(Bucket=self.bucket, Key=object_key)
+        upload_id = upload['UploadId']
+        parts = []
+        try:
+            # Parts are read and sent one at a time, so memory stays at one part
+            for part in itertools.chain((first, chunk), iter(lambda: stream.read(self.part_size), b'')):
+                if not part:
+                    break
+                response = self.client.upload_part(
+                    Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                    PartNumber=len(parts) + 1, Body=part
+                )
+                parts.append({'PartNumber': len(parts) + 1, 'ETag': response['ETag']})
+
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            raise
+
+    def open(self, key):
+        response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        return response['Body']
+
+    def read_range(self, key, start, end=None):
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), Range=byte_range)
+        return response['Body'].read()
+
+    def local_path(self, key):
+        path = os.path.join(self.cache_dir, *key.split('/'))
+        if os.path.exists(path):
+            # Keys are immutable, so a cached copy stays valid; mark it recently used
+            os.utime(path)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                self.client.download_fileobj(self.bucket, self._object_key(key), fp)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.trim_cache(keep=path)
+        return path
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        cached = os.path.join(self.cache_dir, *key.split('/'))
+        if os.path.exists(cached):
+            os.remove(cached)
+
+    def list(self, prefix):
+        keys = []
+        kwargs = {'Bucket': self.bucket, 'Prefix': self._object_key(prefix)}
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        while True:
+            response = self.client.list_objects_v2(**kwargs)
+            keys.extend(item['Key'][strip:] for item in response.get('Contents', []))
+            if not response.get('IsTruncated'):
+                return keys
+            kwargs['ContinuationToken'] = response['NextContinuationToken']
+
+    def trim_cache(self, keep=None):
+        """Delete the least recently used local copies until the cache fits `cache_max_bytes`."""
+        files = []
+        for directory, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.part'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.cache_max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def url(self, key, expires_in=3600, content_type=None, download_name=None):
+        params = {'Bucket': self.bucket, 'Key': self._object_key(key)}
+        if content_type:
+            params['ResponseContentType'] = content_type
+        if download_name:
+            params['ResponseContentDisposition'] = f'attachment; filename="{download_name}"'
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+
+# ─────────────────────────────────────────────
+#  STORE
+# ─────────────────────────────────────────────
+
+class ArtifactStore:
+    """
+    Small put/get/open API over a sharded, content-addressed key space.
+    Paths handed out look like instance/store/ab/cd/… whatever the driver, so
+    they can be stored on records unchanged. Paths outside the store (files
+    saved before it existed) are read from local disk.
+    """
+
+    def __init__(self, root, driver=None, shard_depth=2, shard_width=2):
+        self.root = root.replace('\\', '/').rstrip('/')
+        self.driver = driver or LocalStorageDriver()
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+        self._legacy = LocalStorageDriver()
+
+    # ── naming ──────────────────────────────
+
+    @staticmethod
+    def normalize_ext(ext):
+        ext = (ext or '').lower().strip()
+        if ext and not ext.startswith('.'):
+            ext = '.' + ext
+        return ext
+
+    def path_for(self, digest, ext=''):
+        shards = [digest[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return '/'.join([self.root] + shards + [digest + self.normalize_ext(ext)])
+
+    def contains(self, path):
+        """True if `path` points inside this store."""
+        if not path:
+            return False
+        path = path.replace('\\', '/')
+        return path.startswith(self.root + '/') and '..' not in path.split('/')
+
+    def _driver_for(self, path):
+        path = path.replace('\\', '/')
+        return (self.driver if self.contains(path) else self._legacy), path
+
+    # ── writes ──────────────────────────────
+
+    def put(self, data, ext=''):
+        """Store bytes; returns their path. Identical content is written once."""
+        path = self.path_for(hashlib.sha256(data).hexdigest(), ext)
+        if not self.driver.exists(path):
+            self.driver.write_stream(path, io.BytesIO(data))
+        return path
+
+    def put_stream(self, stream, ext='', chunk_size=1024 * 1024):
+        """Store a file-like object without holding it all in memory; returns its path."""
+        h = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                h.update(chunk)
+                spool.write(chunk)
+
+            path = self.path_for(h.hexdigest(), ext)
+            if not self.driver.exists(path):
+                spool.seek(0)
+                self.driver.write_stream(path, spool)
+        return path
+
+    def write(self, path, data):
+        """Write derived content (e.g. an overlay) at a path of its own."""
+        driver, path = self._driver_for(path)
+        driver.write_stream(path, io.BytesIO(data))
+        return path
+
+    def delete(self, path):
+        """
+        Remove a file. Only for paths nothing else can share (e.g. a record's
+        reports): content-addressed blobs may belong to several records.
+        """
+        driver, path = self._driver_for(path)
+        driver.delete(path)
+
+    def delete_prefix(self, prefix):
+        """Remove every file under a store directory such as instance/store/reports/12/."""
+        prefix = prefix.replace('\\', '/').rstrip('/') + '/'
+        if not self.contains(prefix + 'x'):
+            raise ValueError(f"{prefix} is outside the store")
+        for key in self.driver.list(prefix):
+            self.driver.delete(key)
+
+    # ── reads ───────────────────────────────
+
+    def exists(self, path):
+        if not path:
+            return False
+        driver, path = self._driver_for(path)
+        return driver.exists(path)
+
+    def size(self, path):
+        driver, path = self._driver_for(path)
+        return driver.size(path)
+
+    def open(self, path):
+        driver, path = self._driver_for(path)
+        return driver.open(path)
+
+    def get(self, path):
+        fp = self.open(path)
+        try:
+            return fp.read()
+        finally:
+            fp.close()
+
+    def read_range(self, path, start, end=None):
+        driver, path = self._driver_for(path)
+        return driver.read_range(path, start, end)
+
+    def local_path(self, path):
+        driver, path = self._driver_for(path)
+        return driver.local_path(path)
+
+    def url(self, path, expires_in=3600, content_type=None, download_name=None):
+        driver, path = self._driver_for(path)
+        return driver.url(path, expires_in, content_type=content_type, download_name=download_name)
@@ -0,0 +1,168 @@
+"""
+bench_db_writes.py
+O-Scan Diagnostics — Concurrent Write Benchmark
+Hammers a scratch copy of the schema from several threads the way chat posts
+do (insert a message, update the record status), while reader threads run
+dashboard-style queries. Runs once with SQLite's stock settings and once
+with the tuned connection setup from db_engine.py, then prints throughput,
+latency and "database is locked" failures for both.
+
+    python bench_db_writes.py --writers 8 --readers 4 --ops 200
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from db_engine import configure_engine
+from models import db, ChatMessage, PatientRecord, User
+
+
+# ─────────────────────────────────────────────
+#  INTERNAL HELPERS
+# ─────────────────────────────────────────────
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _seed(engine, records):
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"username": "bench_patient", "email": "patient@bench", "password": "x", "role": "patient"},
+            {"username": "bench_doctor", "email": "doctor@bench", "password": "x", "role": "doctor"},
+        ])
+        conn.execute(PatientRecord.__table__.insert(), [
+            {"public_id": f"BENCH{i:021d}", "user_id": 1, "doctor_id": 2, "timestamp": datetime(2024, 1, 1) + timedelta(minutes=i),
+             "image_path": "static/bench.jpg", "status": "Pending", "prediction": "Risk (Cancer)"}
+            for i in range(records)
+        ])
+
+
+# ─────────────────────────────────────────────
+#  BENCHMARK
+# ─────────────────────────────────────────────
+
+def run(label, config, writers, readers, ops, records):
+    """One run against a fresh database; `config` None means SQLite's stock settings."""
+    workdir = tempfile.mkdtemp(prefix="oscan-bench-")
+    try:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            pool_size=writers + readers, max_overflow=0
+        )
+        if config is not None:
+            configure_engine(engine, config)
+        _seed(engine, records)
+
+        latencies, errors, reads = [], [], [0]
+        lock = threading.Lock()
+        writing = threading.Event()
+
+        def writer(n):
+            for i in range(ops):
+                record_id = (n * ops + i) % records + 1
+                started = time.perf_counter()
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(ChatMessage.__table__.insert().values(
+                            record_id=record_id, sender_id=2, sender_role="doctor",
+                            message=f"message {n}-{i}", message_type="text"
+                        ))
+                        conn.execute(PatientRecord.__table__.update().where(
+                            PatientRecord.__table__.c.id == record_id
+                        ).values(status="Replied"))
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e.orig))
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+        def reader():
+            query = select(func.count(ChatMessage.__table__.c.id)).where(ChatMessage.__table__.c.sender_role == "doctor")
+            while writing.is_set():
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(query).scalar()
+                    with lock:
+                        reads[0] += 1
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e.orig))
+
+        writing.set()
+        reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        started = time.perf_counter()
+        for t in reader_threads + writer_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        writing.clear()
+        for t in reader_threads:
+            t.join()
+
+        with engine.connect() as conn:
+            journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "label": label,
+        "journal_mode": journal_mode,
+        "writes": len(latencies),
+        "writes_per_sec": len(latencies) / elapsed if elapsed else 0,
+        "reads_per_sec": reads[0] / elapsed if elapsed else 0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "locked_errors": sum(1 for e in errors if "locked" in e),
+        "other_errors": sum(1 for e in errors if "locked" not in e),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8, help="Concurrent writer threads")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent reader threads")
+    parser.add_argument("--ops", type=int, default=200, help="Transactions per writer")
+    parser.add_argument("--records", type=int, default=500, help="Seeded patient records")
+    parser.add_argument("--journal-mode", default=os.environ.get("SQLITE_JOURNAL_MODE", "WAL"))
+    parser.add_argument("--synchronous", default=os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"))
+    parser.add_argument("--busy-timeout-ms", type=int, default=int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)))
+    parser.add_argument("--mmap-size-mb", type=int, default=int(os.environ.get("SQLITE_MMAP_SIZE_MB", 64)))
+    args = parser.parse_args()
+
+    tuned = {
+        "SQLITE_JOURNAL_MODE": args.journal_mode,
+        "SQLITE_SYNCHRONOUS": args.synchronous,
+        "SQLITE_BUSY_TIMEOUT_MS": args.busy_timeout_ms,
+        "SQLITE_MMAP_SIZE_MB": args.mmap_size_mb,
+    }
+    results = [
+        run("stock", None, args.writers, args.readers, args.ops, args.records),
+        run("tuned", tuned, args.writers, args.readers, args.ops, args.records),
+    ]
+
+    print(f"{args.writers} writers x {args.ops} transactions, {args.readers} readers")
+    print(f"{'setup':<8}{'journal':<9}{'writes/s':>10}{'reads/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'locked':>8}{'other':>7}")
+    for r in results:
+        print(f"{r['label']:<8}{r['journal_mode']:<9}{r['writes_per_sec']:>10.1f}{r['reads_per_sec']:>10.1f}"
+              f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['locked_errors']:>8}{r['other_errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+db_engine.py
+O-Scan Diagnostics — Database Engine Setup
+Engine options and per-connection tuning for the configured database.
+SQLite gets write-ahead logging (readers stop blocking the writer),
+synchronous=NORMAL, a busy timeout so writers queue instead of failing with
+"database is locked", and memory-mapped reads. PostgreSQL gets a sized,
+pre-pinged connection pool and a statement timeout on every connection.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def normalize_database_url(url):
+    """Accept Heroku-style postgres:// URLs, which SQLAlchemy no longer does."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database URL."""
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        # One local file: SQLAlchemy's default pool is the right one
+        return {}
+
+    return {
+        # Connections dropped by the server or a proxy are replaced, not handed to a request
+        "pool_pre_ping": True,
+        "pool_size": int(config.get('DB_POOL_SIZE', 10)),
+        "max_overflow": int(config.get('DB_MAX_OVERFLOW', 20)),
+        "pool_timeout": int(config.get('DB_POOL_TIMEOUT', 30)),
+        "pool_recycle": int(config.get('DB_POOL_RECYCLE', 1800)),
+    }
+
+
+def sqlite_pragmas(config):
+    """PRAGMA statements for the SQLITE_* settings of a config mapping."""
+    journal_mode = str(config.get('SQLITE_JOURNAL_MODE', 'WAL')).upper()
+    synchronous = str(config.get('SQLITE_SYNCHRONOUS', 'NORMAL')).upper()
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLITE_JOURNAL_MODE: {journal_mode}")
+    if synchronous not in SQLITE_SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Unsupported SQLITE_SYNCHRONOUS: {synchronous}")
+
+    return [
+        # Busy timeout first, so waiting on a lock applies to the statements below too
+        f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA journal_mode = {journal_mode}",
+        f"PRAGMA synchronous = {synchronous}",
+        f"PRAGMA mmap_size = {int(config.get('SQLITE_MMAP_SIZE_MB', 64)) * 1024 * 1024}",
+    ]
+
+
+def configure_engine(engine, config):
+    """Apply the per-connection settings for `engine`'s dialect; call before first use."""
+    if engine.dialect.name == 'postgresql':
+        statement_timeout = int(config.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+
+        @event.listens_for(engine, 'connect')
+        def set_postgres_timeouts(dbapi_connection, connection_record):
+            # Session default, so every statement a request (or job) runs is bounded
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(f"SET statement_timeout = {statement_timeout}")
+            finally:
+                cursor.close()
+            dbapi_connection.commit()
+        return
+
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
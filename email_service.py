@@ -39,11 +39,13 @@ def init_mail(app):
 #  INTERNAL HELPERS
 # ─────────────────────────────────────────────
 
-def _send_async(app, msg, attachment_path=None, attachment_name=None):
+def _send_async(app, msg, attachment_path=None, attachment_name=None, attachment_data=None):
     """Send a Flask-Mail message inside an application context (background thread)."""
     with app.app_context():
         try:
-            if attachment_path and os.path.exists(attachment_path):
+            if attachment_data is not None:
+                msg.attach(attachment_name or "report.pdf", 'application/pdf', attachment_data)
+            elif attachment_path and os.path.exists(attachment_path):
                 with open(attachment_path, 'rb') as fp:
                     msg.attach(
                         attachment_name or os.path.basename(attachment_path),
@@ -56,11 +58,11 @@ def _send_async(app, msg, attachment_path=None, attachment_name=None):
             print(f"[EMAIL ERROR] Failed to send '{msg.subject}': {e}")
 
 
-def _dispatch(app, msg, attachment_path=None, attachment_name=None):
+def _dispatch(app, msg, attachment_path=None, attachment_name=None, attachment_data=None):
     """Fire-and-forget email dispatch on a daemon thread."""
     t = threading.Thread(
         target=_send_async,
-        args=(app, msg, attachment_path, attachment_name),
+        args=(app, msg, attachment_path, attachment_name, attachment_data),
         daemon=True
     )
     t.start()
@@ -312,8 +314,8 @@ def send_signup_welcome(app, user):
 #  3. SCAN RESULT → PATIENT (PDF attached)
 # ─────────────────────────────────────────────
 
-def send_scan_result_to_patient(app, user, record, pdf_path=None):
-    """Send scan result email with PDF report attached to the patient."""
+def send_scan_result_to_patient(app, user, record, pdf_path=None, pdf_data=None):
+    """Send scan result email with PDF report attached to the patient (from a file or in-memory bytes)."""
     is_risk = "Risk" in (record.prediction or "")
     risk_color = "#dc2626" if is_risk else "#16a34a"
     risk_bg = "#fef2f2" if is_risk else "#f0fdf4"
@@ -355,8 +357,8 @@ def send_scan_result_to_patient(app, user, record, pdf_path=None):
     <table width="100%" cellpadding="0" cellspacing="0"
            style="border-radius:10px;overflow:hidden;border:1px solid #e8ecf0;">
       {_info_row("Patient", user.username)}
-      {_info_row("Scan ID", record.timestamp or "—")}
-      {_info_row("Date", (record.timestamp or "")[:8] or datetime.now().strftime("%Y%m%d"))}
+      {_info_row("Scan ID", record.scan_id or "—")}
+      {_info_row("Date", record.scan_id[:8] or datetime.now().strftime("%Y%m%d"))}
       {_info_row("Result", record.prediction or "—")}
       {_info_row("Confidence", f"{record.confidence or '—'}%")}
     </table>
@@ -367,7 +369,7 @@ def send_scan_result_to_patient(app, user, record, pdf_path=None):
       📎 <strong>Your full PDF report is attached</strong> to this email for your records.
     </p>"""
 
-    pdf_name = f"OScan_Report_{record.timestamp}.pdf" if record.timestamp else "OScan_Report.pdf"
+    pdf_name = f"OScan_Report_{record.scan_id}.pdf" if record.timestamp else "OScan_Report.pdf"
 
     msg = Message(
         subject=f"🩺 Your O-Scan Report — {risk_label} Detected",
@@ -375,7 +377,7 @@ def send_scan_result_to_patient(app, user, record, pdf_path=None):
         html=_base_html("Scan Report", header_html, body_html,
                         footer_note="Your health data is protected. This report is confidential and intended only for the recipient.")
     )
-    _dispatch(app, msg, attachment_path=pdf_path, attachment_name=pdf_name)
+    _dispatch(app, msg, attachment_path=pdf_path, attachment_name=pdf_name, attachment_data=pdf_data)
 
 
 # ─────────────────────────────────────────────
@@ -420,7 +422,7 @@ def send_new_case_to_doctor(app, doctor, patient, record):
            style="border-radius:10px;overflow:hidden;border:1px solid #e8ecf0;">
       {_info_row("Patient Name", patient.username)}
       {_info_row("Patient Email", patient.email)}
-      {_info_row("Scan ID", record.timestamp or "—")}
+      {_info_row("Scan ID", record.scan_id or "—")}
       {_info_row("AI Result", record.prediction or "—")}
       {_info_row("Confidence", f"{record.confidence or '—'}%")}
       {_info_row("Pain Level", record.pain_level or "—")}
@@ -0,0 +1,229 @@
+"""
+inference_backends.py
+O-Scan Diagnostics — Inference Backends
+Common interface behind model scoring and Grad-CAM, with the full Keras
+model and a converted TensorFlow Lite interpreter as interchangeable
+backends. TensorFlow is only imported when a backend needs it.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+# ─────────────────────────────────────────────
+#  GRAD-CAM (KERAS)
+# ─────────────────────────────────────────────
+
+def get_last_conv_layer_name(model):
+    """
+    Find the name of the last convolutional layer in the model
+    """
+    for layer in reversed(model.layers):
+        if 'conv' in layer.name.lower():
+            return layer.name
+    return None
+
+
+def build_gradcam_model(model, last_conv_layer_name):
+    """
+    Build the Grad-CAM model once: maps the input image to the activations
+    of the last conv layer as well as the output predictions
+    """
+    import tensorflow as tf
+
+    if not last_conv_layer_name:
+        return None
+    return tf.keras.models.Model(
+        model.inputs,
+        [model.get_layer(last_conv_layer_name).output, model.output]
+    )
+
+
+def make_gradcam_heatmaps(img_batch, grad_model, pred_index=None):
+    """
+    Score a batch of images and generate their Grad-CAM heatmaps
+    from a single taped forward pass. Returns (preds, heatmaps).
+    """
+    import tensorflow as tf
+
+    img_batch = tf.convert_to_tensor(img_batch, dtype=tf.float32)
+
+    # Compute the gradient of the top predicted class for each input image
+    # with respect to the activations of the last conv layer.
+    # Samples are independent at inference, so the gradient of the summed
+    # class outputs gives every sample its own gradient.
+    with tf.GradientTape() as tape:
+        last_conv_layer_output, preds = grad_model(img_batch, training=False)
+        if pred_index is None:
+            class_index = tf.argmax(preds, axis=1)
+        else:
+            class_index = tf.fill([tf.shape(preds)[0]], tf.cast(pred_index, tf.int64))
+        class_channel = tf.gather(preds, class_index, axis=1, batch_dims=1)
+
+    # This is the gradient of the output neuron (top predicted or chosen)
+    # with regard to the output feature map of the last conv layer
+    grads = tape.gradient(class_channel, last_conv_layer_output)
+
+    # Mean intensity of the gradient over each feature map channel, per image
+    pooled_grads = tf.reduce_mean(grads, axis=(1, 2))
+
+    # We multiply each channel in the feature map array
+    # by "how important this channel is" with regard to the top predicted class
+    # then sum all the channels to obtain the heatmap class activation
+    heatmaps = tf.einsum('bhwc,bc->bhw', last_conv_layer_output, pooled_grads)
+
+    # For visualization purpose, we will also normalize each heatmap between 0 & 1
+    heatmaps = tf.maximum(heatmaps, 0)
+    heatmaps = tf.math.divide_no_nan(heatmaps, tf.reduce_max(heatmaps, axis=(1, 2), keepdims=True))
+    return preds.numpy(), heatmaps.numpy()
+
+
+# ─────────────────────────────────────────────
+#  BACKENDS
+# ─────────────────────────────────────────────
+
+class InferenceBackend(ABC):
+    """
+    Interface used by the inference scheduler.
+    `predict` returns an (N, 1) array of scores; `predict_with_gradcam`
+    returns (scores, heatmaps) with heatmaps None when Grad-CAM is unavailable.
+    """
+
+    name = "base"
+
+    @property
+    def supports_gradcam(self):
+        return False
+
+    @abstractmethod
+    def predict(self, img_batch):
+        """Score an (N, 224, 224, 3) float32 batch."""
+
+    def predict_with_gradcam(self, img_batch):
+        return self.predict(img_batch), None
+
+
+class KerasBackend(InferenceBackend):
+    """Full Keras model; scores and Grad-CAM come from one taped pass."""
+
+    name = "keras"
+
+    def __init__(self, model):
+        self.model = model
+        self.last_conv_layer = get_last_conv_layer_name(model)
+        try:
+            self.gradcam_model = build_gradcam_model(model, self.last_conv_layer) if self.last_conv_layer else None
+        except Exception as e:
+            print(f"Grad-CAM model could not be built: {e}")
+            self.gradcam_model = None
+
+    @property
+    def supports_gradcam(self):
+        return self.gradcam_model is not None
+
+    def predict(self, img_batch):
+        return np.asarray(self.model.predict(img_batch, verbose=0))
+
+    def predict_with_gradcam(self, img_batch):
+        # Score and Grad-CAM come from the same taped forward pass
+        if self.gradcam_model is not None:
+            try:
+                return make_gradcam_heatmaps(img_batch, self.gradcam_model)
+            except Exception as e:
+                print(f"Error generating Grad-CAM for batch of {len(img_batch)}: {e}")
+
+        # Plain batched prediction if Grad-CAM is unavailable or failed
+        return self.predict(img_batch), None
+
+
+def _tflite_interpreter_class():
+    """Prefer the slim tflite-runtime package, fall back to full TensorFlow."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    Converted TensorFlow Lite model. Interpreters can't take gradients, so
+    Grad-CAM is delegated to `gradcam_backend` when one is given, or to the
+    backend `gradcam_loader()` returns, called once on the first Grad-CAM.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path=None, model_content=None, num_threads=None, gradcam_backend=None, gradcam_loader=None):
+        Interpreter = _tflite_interpreter_class()
+        self.interpreter = Interpreter(model_path=model_path, model_content=model_content, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+        self.gradcam_backend = gradcam_backend
+        self._gradcam_loader = gradcam_loader
+        self._gradcam_lock = threading.Lock()
+
+    @property
+    def supports_gradcam(self):
+        if self.gradcam_backend is not None:
+            return self.gradcam_backend.supports_gradcam
+        return self._gradcam_loader is not None
+
+    def _get_gradcam_backend(self):
+        """The Grad-CAM backend, loaded on first use; None if it can't be loaded"""
+        with self._gradcam_lock:
+            if self.gradcam_backend is None and self._gradcam_loader is not None:
+                try:
+                    self.gradcam_backend = self._gradcam_loader()
+                except Exception as e:
+                    print(f"Grad-CAM model could not be loaded: {e}")
+                self._gradcam_loader = None
+            return self.gradcam_backend
+
+    def predict(self, img_batch):
+        img_batch = np.ascontiguousarray(img_batch, dtype=self._input['dtype'])
+        with self._lock:
+            # Interpreter tensors are sized per batch; only reallocate when N changes
+            if self._batch_size != len(img_batch):
+                self.interpreter.resize_tensor_input(self._input['index'], list(img_batch.shape))
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(img_batch)
+            self.interpreter.set_tensor(self._input['index'], img_batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index).copy()
+
+    def predict_with_gradcam(self, img_batch):
+        preds = self.predict(img_batch)
+        gradcam_backend = self._get_gradcam_backend()
+        if gradcam_backend is None or not gradcam_backend.supports_gradcam:
+            return preds, None
+        _, heatmaps = gradcam_backend.predict_with_gradcam(img_batch)
+        return preds, heatmaps
+
+
+# ─────────────────────────────────────────────
+#  CONVERSION & CHECKS
+# ─────────────────────────────────────────────
+
+def convert_to_tflite(keras_model, output_path=None):
+    """Convert a Keras model to a float32 TFLite flatbuffer, optionally saving it."""
+    import tensorflow as tf
+
+    content = tf.lite.TFLiteConverter.from_keras_model(keras_model).convert()
+    if output_path:
+        with open(output_path, 'wb') as fp:
+            fp.write(content)
+    return content
+
+
+def max_score_difference(reference, candidate, samples=2, seed=0):
+    """Largest absolute score difference between two backends on random inputs."""
+    rng = np.random.default_rng(seed)
+    img_batch = rng.random((samples, 224, 224, 3), dtype=np.float32)
+    return float(np.max(np.abs(reference.predict(img_batch) - candidate.predict(img_batch))))
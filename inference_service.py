@@ -0,0 +1,177 @@
+"""
+inference_service.py
+O-Scan Diagnostics — Shared Inference Scheduler
+Collects preprocessed images from every in-flight /predict request and runs
+them through the model in micro-batches, bounded by a time window and a
+maximum batch size. Each caller gets back only the rows for its own images.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+
+# ─────────────────────────────────────────────
+#  INTERNAL HELPERS
+# ─────────────────────────────────────────────
+
+class _Job:
+    """One caller's images plus the slot its results are handed back in."""
+
+    def __init__(self, images):
+        self.images = images
+        self.size = len(images)
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _split_outputs(outputs, offsets):
+    """Slice every batched output back into per-job pieces."""
+    if not isinstance(outputs, tuple):
+        outputs = (outputs,)
+        single = True
+    else:
+        single = False
+
+    pieces = []
+    for start, end in offsets:
+        piece = tuple(o[start:end] if o is not None else None for o in outputs)
+        pieces.append(piece[0] if single else piece)
+    return pieces
+
+
+# ─────────────────────────────────────────────
+#  SCHEDULER
+# ─────────────────────────────────────────────
+
+class InferenceBatcher:
+    """
+    Dynamic micro-batching in front of a batch function.
+    `batch_fn` takes an (N, H, W, C) array and returns an array or a tuple
+    of arrays whose first dimension is N (None entries are passed through).
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, batch_window_ms=10):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.batch_window = max(0, float(batch_window_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._carry = None
+        self._lock = threading.Lock()
+        self._worker = None
+
+        self._batch_sizes = Counter()
+        self._jobs_served = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+
+    def submit(self, images, timeout=None):
+        """Queue a caller's images and block until its results are ready."""
+        images = np.asarray(images)
+        if images.ndim == 3:
+            images = images[np.newaxis, ...]
+
+        self._ensure_worker()
+        job = _Job(images)
+        self._queue.put(job)
+        with self._lock:
+            self._max_queue_depth = max(self._max_queue_depth, self.queue_depth())
+
+        if not job.done.wait(timeout):
+            raise TimeoutError("Inference request timed out waiting for a batch slot")
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def queue_depth(self):
+        """Number of jobs waiting for a batch."""
+        return self._queue.qsize() + (1 if self._carry is not None else 0)
+
+    def stats(self):
+        """Snapshot of scheduler counters for tuning the window and batch size."""
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            images = sum(size * count for size, count in self._batch_sizes.items())
+            return {
+                "max_batch_size": self.max_batch_size,
+                "batch_window_ms": round(self.batch_window * 1000, 3),
+                "queue_depth": self.queue_depth(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": batches,
+                "jobs": self._jobs_served,
+                "images": images,
+                "mean_batch_size": round(images / batches, 3) if batches else 0,
+                "mean_queue_wait_ms": round(self._total_wait * 1000 / self._jobs_served, 3) if self._jobs_served else 0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+            }
+
+    # ── worker ──────────────────────────────
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._worker.start()
+
+    def _next_job(self, timeout=None):
+        if self._carry is not None:
+            job, self._carry = self._carry, None
+            return job
+        try:
+            return self._queue.get(timeout=timeout) if timeout is None or timeout > 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _collect(self):
+        """Block for the first job, then fill the batch until it is full or the window closes."""
+        jobs = [self._next_job()]
+        total = jobs[0].size
+        deadline = time.monotonic() + self.batch_window
+
+        while total < self.max_batch_size:
+            job = self._next_job(timeout=deadline - time.monotonic())
+            if job is None:
+                break
+            if total + job.size > self.max_batch_size:
+                # Keep it for the next batch rather than overshooting this one
+                self._carry = job
+                break
+            jobs.append(job)
+            total += job.size
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            started = time.monotonic()
+            try:
+                batch = np.concatenate([j.images for j in jobs], axis=0)
+                outputs = self.batch_fn(batch)
+
+                offsets = []
+                start = 0
+                for j in jobs:
+                    offsets.append((start, start + j.size))
+                    start += j.size
+                for job, piece in zip(jobs, _split_outputs(outputs, offsets)):
+                    job.result = piece
+            except Exception as e:
+                print(f"[INFERENCE ERROR] Batch of {len(jobs)} jobs failed: {e}")
+                for job in jobs:
+                    job.error = e
+
+            with self._lock:
+                self._batch_sizes[sum(j.size for j in jobs)] += 1
+                self._jobs_served += len(jobs)
+                self._total_wait += sum(started - j.enqueued_at for j in jobs)
+
+            for job in jobs:
+                job.done.set()
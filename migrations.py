@@ -0,0 +1,202 @@
+"""
+migrations.py
+O-Scan Diagnostics — Schema Upgrades
+`db.create_all()` creates missing tables but never changes existing ones.
+Each step below brings a database created by an older release up to the
+current models. Steps check before they act, so all of them run on every start.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import bindparam, inspect, text
+
+from models import ChatMessage, PatientRecord, SCAN_ID_FORMAT, new_public_id
+
+
+# ─────────────────────────────────────────────
+#  INTERNAL HELPERS
+# ─────────────────────────────────────────────
+
+def _columns(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+def _record_created_at(timestamp):
+    """Seconds since the epoch for a record timestamp (datetime, stored text or legacy YYYYMMDD_HHMMSS), or None."""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    for fmt in (SCAN_ID_FORMAT, "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(timestamp, fmt).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _legacy_thread(blob):
+    """Messages of an old doctor_replies/patient_replies column (JSON list or plain text)."""
+    if not blob:
+        return []
+    try:
+        thread = json.loads(blob)
+    except ValueError:
+        return [{"message": blob}]
+    if not isinstance(thread, list):
+        return [{"message": str(thread)}]
+    return [m if isinstance(m, dict) else {"message": str(m)} for m in thread]
+
+
+# ─────────────────────────────────────────────
+#  STEPS
+# ─────────────────────────────────────────────
+
+def add_record_public_ids(conn):
+    """Add patient_record.public_id and give every existing row one."""
+    if 'public_id' not in _columns(conn, 'patient_record'):
+        conn.execute(text("ALTER TABLE patient_record ADD COLUMN public_id VARCHAR(26)"))
+
+    rows = conn.execute(text("SELECT id, timestamp FROM patient_record WHERE public_id IS NULL")).fetchall()
+    if not rows:
+        return
+
+    # Ids are derived from the scan time so they keep sorting like the old timestamps
+    conn.execute(
+        text("UPDATE patient_record SET public_id = :public_id WHERE id = :id"),
+        [{"id": row_id, "public_id": new_public_id(_record_created_at(timestamp))} for row_id, timestamp in rows]
+    )
+    print(f"[MIGRATION] Backfilled public ids for {len(rows)} patient records")
+
+
+def add_record_indexes(conn):
+    """Indexes create_all() only builds for new tables (names match the models)."""
+    indexes = (
+        ("ix_patient_record_public_id", "public_id", True),
+        ("ix_patient_record_user_id", "user_id", False),
+        ("ix_patient_record_doctor_id", "doctor_id", False),
+        ("ix_patient_record_status", "status", False),
+        ("ix_patient_record_doctor_timestamp", "doctor_id, timestamp, id", False),
+        ("ix_patient_record_user_timestamp", "user_id, timestamp, id", False),
+    )
+    for name, columns, unique in indexes:
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON patient_record ({columns})"
+        ))
+
+
+def add_appointment_indexes(conn):
+    """Calendar range indexes on an existing appointment table."""
+    indexes = (
+        ("ix_appointment_doctor_start", "doctor_id, start_time"),
+        ("ix_appointment_patient_start", "patient_id, start_time"),
+    )
+    for name, columns in indexes:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON appointment ({columns})"))
+
+
+def move_replies_to_chat_messages(conn):
+    """Copy the JSON reply columns of older databases into chat_message rows."""
+    if 'doctor_replies' not in _columns(conn, 'patient_record'):
+        return
+
+    rows = conn.execute(text(
+        "SELECT id, user_id, doctor_id, timestamp, doctor_replies, patient_replies FROM patient_record"
+        " WHERE doctor_replies IS NOT NULL OR patient_replies IS NOT NULL"
+    )).fetchall()
+
+    messages = []
+    for record_id, user_id, doctor_id, timestamp, doctor_replies, patient_replies in rows:
+        fallback = datetime.fromtimestamp(_record_created_at(timestamp) or 0)
+        thread = []
+        for role, sender_id, blob in (("doctor", doctor_id, doctor_replies), ("patient", user_id, patient_replies)):
+            for m in _legacy_thread(blob):
+                try:
+                    sent_at = datetime.strptime(m.get("time", ""), "%Y-%m-%d %H:%M:%S")
+                except (TypeError, ValueError):
+                    sent_at = fallback
+                thread.append({
+                    "record_id": record_id,
+                    "sender_id": sender_id,
+                    "sender_role": role,
+                    "message": m.get("message"),
+                    "message_type": m.get("type") or "text",
+                    "file_path": m.get("file_path"),
+                    "sent_at": sent_at,
+                })
+        # Both sides are merged in send order, so ids page the thread chronologically
+        thread.sort(key=lambda m: m["sent_at"])
+        messages.extend(thread)
+
+    if messages:
+        conn.execute(ChatMessage.__table__.insert(), messages)
+        print(f"[MIGRATION] Moved {len(messages)} chat messages out of {len(rows)} patient records")
+    # Cleared so the copy is never repeated; the columns are no longer mapped
+    conn.execute(text("UPDATE patient_record SET doctor_replies = NULL, patient_replies = NULL"
+                      " WHERE doctor_replies IS NOT NULL OR patient_replies IS NOT NULL"))
+
+
+def convert_record_timestamps(conn):
+    """Rewrite legacy YYYYMMDD_HHMMSS strings in SQLite as real datetimes."""
+    # SQLite keeps whatever text was stored; other databases were created with the datetime type
+    if conn.dialect.name != 'sqlite':
+        return
+
+    rows = conn.execute(text(
+        "SELECT id, timestamp FROM patient_record WHERE timestamp NOT LIKE '____-__-__%'"
+    )).fetchall()
+    if not rows:
+        return
+
+    table = PatientRecord.__table__
+    conn.execute(
+        table.update().where(table.c.id == bindparam('row_id')).values(timestamp=bindparam('scanned_at')),
+        [{"row_id": row_id, "scanned_at": datetime.fromtimestamp(_record_created_at(timestamp) or 0)} for row_id, timestamp in rows]
+    )
+    print(f"[MIGRATION] Converted {len(rows)} patient record timestamps to datetimes")
+
+
+# Applied in order on every start
+MIGRATIONS = [
+    add_record_public_ids,
+    add_record_indexes,
+    add_appointment_indexes,
+    move_replies_to_chat_messages,
+    convert_record_timestamps,
+]
+
+
+def upgrade_schema(db):
+    """Run every step in one transaction, after db.create_all()."""
+    with db.engine.begin() as conn:
+        for step in MIGRATIONS:
+            step(conn)
+
+
+# ─────────────────────────────────────────────
+#  STORE RELOCATION
+# ─────────────────────────────────────────────
+
+# Columns holding artifact store paths (image_path is a comma-separated list)
+STORED_PATH_COLUMNS = (
+    ("patient_record", "image_path"),
+    ("patient_record", "pdf_path"),
+    ("patient_record", "audio_path"),
+    ("record_artifact", "path"),
+    ("chat_message", "file_path"),
+)
+
+
+def move_store_paths(conn, old_root, new_root):
+    """Repoint saved paths from one store root to another; the caller moves the files."""
+    old, new = old_root.rstrip('/') + '/', new_root.rstrip('/') + '/'
+    if old == new:
+        return
+
+    moved = 0
+    for table, column in STORED_PATH_COLUMNS:
+        moved += conn.execute(
+            text(f"UPDATE {table} SET {column} = REPLACE({column}, :old, :new) WHERE {column} LIKE :pattern"),
+            {"old": old, "new": new, "pattern": f"%{old}%"}
+        ).rowcount
+    if moved:
+        print(f"[MIGRATION] Repointed {moved} stored paths from {old} to {new}")
@@ -1,23 +1,40 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+import os
+import time
 
 db = SQLAlchemy()
 
+# Scan label derived from a record's timestamp (file names, reports, emails)
+SCAN_ID_FORMAT = "%Y%m%d_%H%M%S"
+
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+def new_public_id(created_at=None):
+    """
+    ULID-style id: 48-bit millisecond timestamp + 80 random bits in Crockford
+    base32 (26 chars). Unguessable, URL-safe and sorts by creation time.
+    """
+    ms = int((time.time() if created_at is None else created_at) * 1000)
+    value = (ms << 80) | int.from_bytes(os.urandom(10), 'big')
+    return ''.join(CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5))
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True, nullable=False)
     email = db.Column(db.String(150), unique=True, nullable=False)
-    password = db.Column(db.String(150), nullable=False)
+    password = db.Column(db.String(255), nullable=False) # scrypt hashes are ~160 chars
     role = db.Column(db.String(50), nullable=False)  # 'patient' or 'doctor'
     specialization = db.Column(db.String(150), nullable=True) # Only for doctors
 
 class PatientRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    doctor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True) # Assigned doctor
-    timestamp = db.Column(db.String(50), nullable=False)
-    image_path = db.Column(db.String(200), nullable=False)
+    public_id = db.Column(db.String(26), unique=True, index=True, nullable=False, default=new_public_id) # Used in URLs and forms
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True) # Assigned doctor
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.now) # Scan time (local)
+    image_path = db.Column(db.Text, nullable=False) # Comma-separated store paths, one per view
     
     # Store symptoms as individual columns for better querying query
     pain_level = db.Column(db.String(50))
@@ -33,9 +50,7 @@ class PatientRecord(db.Model):
     mouth_pain = db.Column(db.String(50))
     extra_details = db.Column(db.Text)
     
-    status = db.Column(db.String(50), default="Pending")
-    doctor_replies = db.Column(db.Text) # JSON string or simple text for now
-    patient_replies = db.Column(db.Text) # JSON string or complicated text
+    status = db.Column(db.String(50), default="Pending", index=True)
     prediction = db.Column(db.String(100))
     confidence = db.Column(db.String(50))
     pdf_path = db.Column(db.String(200))
@@ -44,6 +59,40 @@ class PatientRecord(db.Model):
     user = db.relationship('User', foreign_keys=[user_id], backref=db.backref('patient_records', lazy=True))
     doctor = db.relationship('User', foreign_keys=[doctor_id], backref=db.backref('doctor_cases', lazy=True))
 
+    @property
+    def scan_id(self):
+        """YYYYMMDD_HHMMSS label of the scan, as shown on reports and in file names"""
+        return self.timestamp.strftime(SCAN_ID_FORMAT) if self.timestamp else ""
+
+    __table_args__ = (
+        # Newest-first keyset paging of one doctor's or patient's records
+        db.Index('ix_patient_record_doctor_timestamp', 'doctor_id', 'timestamp', 'id'),
+        db.Index('ix_patient_record_user_timestamp', 'user_id', 'timestamp', 'id'),
+    )
+
+class ChatMessage(db.Model):
+    # One message of a record's consultation thread; rows are only ever inserted
+    id = db.Column(db.Integer, primary_key=True) # Also the paging cursor
+    record_id = db.Column(db.Integer, db.ForeignKey('patient_record.id'), nullable=False)
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    sender_role = db.Column(db.String(20), nullable=False) # 'doctor' or 'patient'
+    message = db.Column(db.Text)
+    message_type = db.Column(db.String(20), default='text') # text, image, video, file, audio
+    file_path = db.Column(db.String(300), nullable=True)
+    sent_at = db.Column(db.DateTime, default=datetime.now) # Local time, as shown in the thread
+
+    record = db.relationship('PatientRecord', backref=db.backref('messages', lazy=True, cascade='all, delete-orphan'))
+    sender = db.relationship('User', foreign_keys=[sender_id])
+
+    __table_args__ = (
+        db.Index('ix_chat_message_record_id', 'record_id', 'id'),
+        db.Index('ix_chat_message_record_sender', 'record_id', 'sender_role'),
+    )
+
+    @property
+    def time(self):
+        return self.sent_at.strftime("%Y-%m-%d %H:%M:%S") if self.sent_at else ""
+
 class Appointment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -55,3 +104,58 @@ class Appointment(db.Model):
 
     patient = db.relationship('User', foreign_keys=[patient_id], backref=db.backref('appointments_as_patient', lazy=True))
     doctor = db.relationship('User', foreign_keys=[doctor_id], backref=db.backref('appointments_as_doctor', lazy=True))
+
+    __table_args__ = (
+        # Calendar range queries for one doctor or patient
+        db.Index('ix_appointment_doctor_start', 'doctor_id', 'start_time'),
+        db.Index('ix_appointment_patient_start', 'patient_id', 'start_time'),
+    )
+
+class ScreeningJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True) # uuid4 hex, returned by /predict
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    record_id = db.Column(db.Integer, db.ForeignKey('patient_record.id'), nullable=True) # Set once the record is saved
+    status = db.Column(db.String(20), default='queued') # queued, running, done, failed
+    stage = db.Column(db.String(50), default='queued') # inference, saving, report, notifications, done
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Deleting a record keeps its job history; record_id is nulled
+    record = db.relationship('PatientRecord', foreign_keys=[record_id], backref=db.backref('screening_jobs', lazy=True))
+
+class RecordArtifact(db.Model):
+    # Every file a screening produces, so reports never have to scan upload folders
+    id = db.Column(db.Integer, primary_key=True)
+    record_id = db.Column(db.Integer, db.ForeignKey('patient_record.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False) # original, gradcam, pdf, audio
+    view_index = db.Column(db.Integer, nullable=True) # Position of the view for original/gradcam
+    path = db.Column(db.String(300), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    record = db.relationship('PatientRecord', backref=db.backref('artifacts', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_record_artifact_record_kind', 'record_id', 'kind', 'view_index'),
+    )
+
+class ReportJob(db.Model):
+    # Durable queue of PDF renders; unfinished rows are picked up again after a restart
+    id = db.Column(db.Integer, primary_key=True)
+    record_id = db.Column(db.Integer, db.ForeignKey('patient_record.id'), nullable=False)
+    version = db.Column(db.String(64), nullable=False) # Content version of the report being rendered
+    patient_name = db.Column(db.String(150), nullable=True)
+    include_gradcam = db.Column(db.Boolean, default=True)
+    notify = db.Column(db.Boolean, default=False) # Email patient/doctor once the report is stored
+    status = db.Column(db.String(20), default='queued') # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    record = db.relationship('PatientRecord', backref=db.backref('report_jobs', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('ix_report_job_record_version', 'record_id', 'version'),
+        db.Index('ix_report_job_status', 'status', 'updated_at'),
+    )
@@ -0,0 +1,157 @@
+"""
+prediction_cache.py
+O-Scan Diagnostics — Prediction & Heatmap Cache
+Remembers the model score and Grad-CAM heatmap of every scored view, keyed
+by a hash of the decoded pixel data plus the model version, so re-submitted
+photos skip the model. Bounded LRU in memory, optionally backed by SQLite.
+"""
+
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ─────────────────────────────────────────────
+#  INTERNAL HELPERS
+# ─────────────────────────────────────────────
+
+def _pack_heatmap(heatmap):
+    if heatmap is None:
+        return None
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(heatmap), allow_pickle=False)
+    return buf.getvalue()
+
+
+def _unpack_heatmap(blob):
+    if blob is None:
+        return None
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+# ─────────────────────────────────────────────
+#  CACHE
+# ─────────────────────────────────────────────
+
+class PredictionCache:
+    """
+    Thread-safe LRU of (score, heatmap) per view.
+    Pass `db_path` to also persist entries in a SQLite file shared by workers.
+    """
+
+    def __init__(self, max_entries=1024, db_path=None):
+        self.max_entries = max(1, int(max_entries))
+        self.db_path = db_path or None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS prediction_cache ("
+                    " key TEXT PRIMARY KEY, score REAL NOT NULL, heatmap BLOB, last_used REAL NOT NULL)"
+                )
+
+    @staticmethod
+    def key_for(pixels, model_version):
+        """Content hash of a decoded image array for a given model version."""
+        pixels = np.ascontiguousarray(pixels)
+        h = hashlib.sha256()
+        h.update(str(model_version).encode('utf-8'))
+        h.update(f"{pixels.dtype}{pixels.shape}".encode('utf-8'))
+        h.update(pixels.tobytes())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Return (score, heatmap) for a key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load(key) if self.db_path else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key, score, heatmap=None):
+        entry = (float(score), heatmap)
+        with self._lock:
+            self._remember(key, entry)
+        if self.db_path:
+            self._store(key, entry)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": bool(self.db_path),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+    # ── internals ───────────────────────────
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _load(self, key):
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT score, heatmap FROM prediction_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE prediction_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return (row[0], _unpack_heatmap(row[1]))
+        except Exception as e:
+            print(f"[CACHE ERROR] Failed to read prediction cache: {e}")
+            return None
+
+    def _store(self, key, entry):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO prediction_cache (key, score, heatmap, last_used) VALUES (?, ?, ?, ?)",
+                    (key, entry[0], _pack_heatmap(entry[1]), time.time())
+                )
+                # Keep the file bounded too, pruning least recently used rows now and then
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= 100:
+                    self._puts_since_prune = 0
+                    conn.execute(
+                        "DELETE FROM prediction_cache WHERE key NOT IN ("
+                        " SELECT key FROM prediction_cache ORDER BY last_used DESC LIMIT ?)",
+                        (self.max_entries * 10,)
+                    )
+        except Exception as e:
+            print(f"[CACHE ERROR] Failed to persist prediction cache entry: {e}")
@@ -0,0 +1,341 @@
+"""
+report_renderer.py
+O-Scan Diagnostics — PDF Report Renderer
+Pure FPDF layout of a screening report. It takes a plain `spec` dict with
+every value already resolved (local image files, attention maps, clinical
+details), so it can run in a separate process without the Flask app.
+"""
+
+from fpdf import FPDF
+
+
+# ─────────────────────────────────────────────
+#  DOCUMENT TEMPLATE
+# ─────────────────────────────────────────────
+
+class MyPDF(FPDF):
+    def __init__(self, patient_name="Patient", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.patient_name = patient_name
+
+    def header(self):
+        # Professional Header with Logo/Title
+        self.set_font('Arial', 'B', 16)
+        self.set_text_color(0, 51, 102) # Deep Blue
+        self.cell(0, 10, 'O-SCAN DIAGNOSTICS', 0, 1, 'L')
+        self.set_font('Arial', 'I', 10)
+        self.set_text_color(100, 100, 100) # Grey
+        self.cell(0, 5, 'Advanced AI-Powered Oral Screening System', 0, 1, 'L')
+        
+        # Patient Name in Header (Right Adjusted or below title)
+        self.set_xy(140, 10)
+        self.set_font('Arial', 'B', 10)
+        self.set_text_color(0, 0, 0)
+        self.cell(60, 10, f"Patient: {self.patient_name}", 0, 1, 'R')
+        
+        # Line Separator
+        self.set_draw_color(0, 51, 102)
+        self.set_line_width(0.5)
+        self.line(10, 28, 200, 28)
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-20)
+        # Disclaimer line
+        self.set_font('Arial', 'I', 7)
+        self.set_text_color(128, 128, 128)
+        self.multi_cell(0, 3, "DISCLAIMER: This report is generated by an AI assistant and is intended for use as a preliminary screening tool. It is NOT a medical diagnosis. Please consult a specialist for final validation.", 0, 'C')
+        
+        # Page Number
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(0, 0, 0)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'R')
+
+
+# ─────────────────────────────────────────────
+#  RENDERING
+# ─────────────────────────────────────────────
+
+def render_report(spec, output_path=None):
+    """
+    Lay out a report and write it to `output_path`, or return the PDF
+    bytes when no path is given. Keys of `spec`:
+    prediction, confidence, timestamp, symptoms, patient_name,
+    clinical_details, image_paths, gradcam_paths, include_gradcam.
+    """
+    prediction = spec['prediction']
+    confidence = spec['confidence']
+    timestamp = spec['timestamp']
+    symptoms = spec.get('symptoms') or {}
+    patient_name = spec.get('patient_name') or "Patient"
+    include_gradcam = spec.get('include_gradcam', True)
+
+    pdf = MyPDF(patient_name=patient_name)
+    pdf.set_auto_page_break(auto=True, margin=25)
+    pdf.set_left_margin(15)
+    pdf.set_right_margin(15)
+
+    # First page
+    pdf.add_page()
+    
+    # DATE & ID Block combined with Patient Info
+    pdf.set_font("Arial", 'B', 10)
+    pdf.set_text_color(0, 0, 0)
+    
+    # Left: Patient Name
+    pdf.cell(80, 6, f"Patient Name: {patient_name}", 0, 0, 'L')
+    
+    # Right: Report Date
+    pdf.cell(50) # Spacer
+    pdf.cell(25, 6, "Report Date:", 0, 0, 'R')
+    pdf.set_font("Arial", '', 10)
+    pdf.cell(35, 6, timestamp.split('_')[0], 0, 1, 'R')
+    
+    # ID line
+    pdf.set_font("Arial", 'B', 10)
+    pdf.cell(130)
+    pdf.cell(25, 6, "Report ID:", 0, 0, 'R')
+    pdf.set_font("Arial", '', 10)
+    pdf.cell(35, 6, f"{timestamp[-6:]}", 0, 1, 'R')
+    pdf.ln(5)
+
+    # --- SECTION 1: CLINICAL SUMMARY (Prominent) ---
+    pdf.set_fill_color(240, 248, 255) # AliceBlue
+    pdf.set_font("Arial", 'B', 12)
+    pdf.set_text_color(0, 51, 102)
+    pdf.cell(0, 10, "  CLINICAL ASSESSMENT SUMMARY", 0, 1, 'L', fill=True)
+    pdf.ln(2)
+
+    # Dynamic Risk Color
+    if prediction == "Risk (Cancer)":
+        risk_color = (204, 0, 0) # Dark Red
+        bg_risk = (255, 235, 235)
+        status_text = "HIGH RISK detected"
+    else:
+        risk_color = (0, 102, 51) # Dark Green
+        bg_risk = (235, 255, 235)
+        status_text = "LOW RISK detected"
+
+    pdf.set_font("Arial", 'B', 14)
+    pdf.set_text_color(*risk_color)
+    pdf.set_fill_color(*bg_risk)
+    pdf.cell(0, 12, f"  {prediction.upper()} ({confidence}% Confidence)", 0, 1, 'C', fill=True)
+    
+    pdf.set_text_color(0, 0, 0) # Reset
+    pdf.set_font("Times", '', 11)
+    pdf.multi_cell(0, 6, f"\nBased on AI analysis of the provided imagery and patient declaration, the system indicates {status_text}. This result has a confidence score of {confidence}%. Please refer to the detailed observation section below.")
+    pdf.ln(8)
+
+    # --- SECTION 2: PATIENT SYMPTOMS ---
+    pdf.set_fill_color(245, 245, 245)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.set_text_color(0, 51, 102)
+    pdf.cell(0, 8, "  Patient Reported Symptoms", 0, 1, 'L', fill=True)
+    pdf.ln(2)
+
+    # Modern Table Layout (No vertical lines, just bottom borders)
+    pdf.set_text_color(0, 0, 0)
+    
+    def add_row(label, value):
+        pdf.set_font("Arial", 'B', 10)
+        pdf.cell(60, 8, label, 'B', 0)
+        pdf.set_font("Times", '', 11)
+        pdf.cell(0, 8, str(value), 'B', 1)
+
+    add_row("Pain Level", symptoms.get('pain_level', 'N/A'))
+    add_row("History of Bleeding", symptoms.get('bleeding', 'N/A'))
+    add_row("Swelling Present", symptoms.get('swelling', 'N/A'))
+    add_row("Duration of Symptoms", symptoms.get('duration', 'N/A'))
+    add_row("Medical History", symptoms.get('history', 'None'))
+    
+    # Habits
+    habits = symptoms.get('habits', [])
+    # If habits is string, convert to list
+    if isinstance(habits, str):
+        habits = habits.split(',')
+
+    habit_str = "None Reported"
+    if habits:
+        habit_str = ", ".join(habits)
+        years = []
+        if 'Tobacco' in habits: years.append(f"Tobacco: {symptoms.get('tobacco_years')}y")
+        if 'Alcohol' in habits: years.append(f"Alcohol: {symptoms.get('alcohol_years')}y")
+        if 'Smoking' in habits: years.append(f"Smoking: {symptoms.get('smoking_years')}y")
+        if years: habit_str += f" ({', '.join(years)})"
+        
+    add_row("Habits & Lifestyle", habit_str)
+    
+    # Extra
+    extra_str = f"Trismus: {symptoms.get('trismus_test', '-')} | Pain on Open: {symptoms.get('mouth_pain', '-')}"
+    add_row("Additional Signs", extra_str)
+    
+    pdf.ln(10)
+
+    # --- SECTION 3: AI CLINICAL OBSERVATION ---
+    pdf.set_fill_color(245, 245, 245)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.set_text_color(0, 51, 102)
+    pdf.cell(0, 8, "  AI Feature Analysis", 0, 1, 'L', fill=True)
+    pdf.ln(2)
+    pdf.set_text_color(0, 0, 0)
+
+    # Clinical Details
+    clinical_details = {
+        "Suspicious Location": "Analysis Pending", 
+        "Lesion Coloration": "Analysis Pending", 
+        "Surface Texture": "Analysis Pending",
+        "Approx. Size": "Measurement Required", 
+        "Predicted T-Stage": "Assessment Required"
+    }
+    if spec.get('clinical_details'):
+         clinical_details = spec['clinical_details']
+         
+    for k, v in clinical_details.items():
+        add_row(k, v)
+        
+    pdf.ln(8)
+
+    # --- SECTION 4: IMAGING ---
+    # Ensure images fit on this page or start new
+    if pdf.get_y() > 180: pdf.add_page()
+    
+    pdf.set_fill_color(245, 245, 245)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.set_text_color(0, 51, 102)
+    pdf.cell(0, 8, "  Clinical Imagery", 0, 1, 'L', fill=True)
+    pdf.ln(5)
+
+    # Local report-sized JPEGs resolved by the caller (FPDF only takes file names)
+    valid_paths = spec.get('image_paths') or []
+
+    if valid_paths:
+        # Layout logic: Center 1, 2, or 3 images
+        # Max width 180mm.
+        count = len(valid_paths[:3]) # Max 3
+        if count > 0:
+            img_size = 50
+            spacing = 5
+            total_w = (count * img_size) + ((count-1) * spacing)
+            
+            start_x = (210 - total_w) / 2 # Center on A4 (210mm width)
+            y_pos = pdf.get_y()
+            
+            # Check vertical space
+            if y_pos + img_size > 270: 
+                pdf.add_page()
+                y_pos = pdf.get_y()
+
+            # Labels for images
+            labels = ["Front View", "Left Lateral", "Right Lateral"]
+            
+            for i, img_p in enumerate(valid_paths[:3]):
+                x = start_x + (i * (img_size + spacing))
+                
+                # Draw Image
+                try:
+                    # Already a report-sized JPEG derivative
+                    pdf.image(img_p, x=x, y=y_pos, w=img_size, h=img_size)
+                    
+                    # Draw label below
+                    pdf.set_xy(x, y_pos + img_size + 2)
+                    pdf.set_font("Arial", 'I', 9)
+                    pdf.cell(img_size, 5, labels[i] if i < len(labels) else f"View {i+1}", 0, 0, 'C')
+                    
+                except Exception as e:
+                    print(f"Error adding image to PDF: {e}")
+                    pdf.set_xy(x, y_pos)
+                    pdf.cell(img_size, img_size, "Image Error", 1, 0, 'C')
+            
+            pdf.ln(img_size + 10)
+    else:
+         pdf.cell(0, 10, "No valid images found for this report.", 0, 1, 'C')
+
+    # --- SECTION 5: AI ATTENTION MAPS (Grad-CAM) ---
+    pdf.ln(5)
+    if pdf.get_y() > 240: pdf.add_page()
+    
+    pdf.set_fill_color(245, 245, 245)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.set_text_color(0, 51, 102)
+    pdf.cell(0, 8, "  AI Attention Maps (Grad-CAM)", 0, 1, 'L', fill=True)
+    pdf.ln(3)
+    
+    pdf.set_font("Arial", 'I', 9)
+    pdf.set_text_color(100, 100, 100)
+    pdf.cell(0, 5, "Heatmaps show regions that influenced the AI decision most significantly", 0, 1, 'C')
+    pdf.ln(5)
+    
+    gradcam_paths = (spec.get('gradcam_paths') or []) if include_gradcam else []
+    
+    if gradcam_paths:
+        # Layout logic for Grad-CAM images
+        count = len(gradcam_paths[:3])  # Max 3 Grad-CAM images
+        if count > 0:
+            img_size = 45  # Slightly smaller for Grad-CAM
+            spacing = 8
+            total_w = (count * img_size) + ((count-1) * spacing)
+            
+            start_x = (210 - total_w) / 2  # Center on A4
+            y_pos = pdf.get_y()
+            
+            # Check vertical space
+            if y_pos + img_size > 270: 
+                pdf.add_page()
+                y_pos = pdf.get_y()
+            
+            # Labels for Grad-CAM images
+            labels = ["Attention Map 1", "Attention Map 2", "Attention Map 3"]
+            
+            for i, gradcam_p in enumerate(gradcam_paths[:3]):
+                x = start_x + (i * (img_size + spacing))
+                
+                # Draw Grad-CAM Image
+                try:
+                    pdf.image(gradcam_p, x=x, y=y_pos, w=img_size, h=img_size)
+                    
+                    # Draw label below
+                    pdf.set_xy(x, y_pos + img_size + 2)
+                    pdf.set_font("Arial", 'I', 8)
+                    pdf.cell(img_size, 5, labels[i] if i < len(labels) else f"Map {i+1}", 0, 0, 'C')
+                    
+                except Exception as e:
+                    print(f"Error adding Grad-CAM to PDF: {e}")
+                    pdf.set_xy(x, y_pos)
+                    pdf.cell(img_size, img_size, "Grad-CAM Error", 1, 0, 'C')
+            
+            pdf.ln(img_size + 10)
+    else:
+        pdf.set_font("Arial", 'I', 9)
+        pdf.set_text_color(150, 150, 150)
+        if include_gradcam:
+            pdf.cell(0, 8, "Attention maps not available for this analysis", 0, 1, 'C')
+        else:
+            pdf.cell(0, 8, "Attention maps are generated on request from the image gallery", 0, 1, 'C')
+        pdf.ln(8)
+
+    # --- RECOMMENDATION ---
+    pdf.set_draw_color(0, 51, 102)
+    pdf.set_line_width(0.5)
+    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+    pdf.ln(5)
+    
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 6, "CLINICAL RECOMMENDATION:", 0, 1)
+    pdf.set_font("Times", 'I', 11)
+    
+    rec_text = "Routine follow-up is advised."
+    if prediction == "Risk (Cancer)":
+        rec_text = ("IMMEDIATE ACTION REQUIRED: The system has detected features highly consistent with oral pathology. "
+                    "A biopsy is strongly recommended to rule out malignancy. Please refer this patient to an Oncologist "
+                    "or Maxillofacial Surgeon immediately.")
+    
+    pdf.multi_cell(0, 6, rec_text)
+
+    if output_path:
+        pdf.output(output_path)
+        return output_path
+
+    # In memory: FPDF returns the document as a latin-1 string
+    data = pdf.output(dest='S')
+    return data.encode('latin-1') if isinstance(data, str) else bytes(data)
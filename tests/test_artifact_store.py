@@ -0,0 +1,259 @@
+"""
+test_artifact_store.py
+O-Scan Diagnostics — Artifact Store Tests
+The content-addressed store on local disk and on S3, the latter through an
+in-memory stand-in for the boto3 client (no bucket or boto3 needed).
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artifact_store import ArtifactStore, LocalStorageDriver, S3StorageDriver, StorageDriver  # noqa: E402
+
+
+# ─────────────────────────────────────────────
+#  STUB S3 CLIENT
+# ─────────────────────────────────────────────
+
+class ClientError(Exception):
+    """Shaped like botocore's ClientError: the S3 error code sits in `response`."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class StubS3Client:
+    """The boto3 S3 calls the driver makes, backed by a dict; every call is logged."""
+
+    def __init__(self, fail_part=None):
+        self.objects = {}
+        self.uploads = {}
+        self.calls = []
+        self.fail_part = fail_part
+
+    def _log(self, name, **kwargs):
+        self.calls.append((name, kwargs))
+
+    def put_object(self, Bucket, Key, Body):
+        self._log("put_object", Key=Key)
+        self.objects[(Bucket, Key)] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self._log("create_multipart_upload", Key=Key)
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._log("upload_part", Key=Key, PartNumber=PartNumber, size=len(Body))
+        if PartNumber == self.fail_part:
+            raise ClientError("InternalError")
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._log("complete_multipart_upload", Key=Key)
+        parts = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[(Bucket, Key)] = b"".join(parts[n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._log("abort_multipart_upload", Key=Key)
+        self.uploads.pop(UploadId, None)
+
+    def head_object(self, Bucket, Key):
+        self._log("head_object", Key=Key)
+        if (Bucket, Key) not in self.objects:
+            raise ClientError("404")
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def get_object(self, Bucket, Key, Range=None):
+        self._log("get_object", Key=Key, Range=Range)
+        data = self.objects[(Bucket, Key)]
+        if Range:
+            start, _, end = Range[len("bytes="):].partition("-")
+            data = data[int(start):int(end) + 1 if end else None]
+        return {"Body": io.BytesIO(data)}
+
+    def download_fileobj(self, Bucket, Key, fp):
+        self._log("download_fileobj", Key=Key)
+        fp.write(self.objects[(Bucket, Key)])
+
+    def delete_object(self, Bucket, Key):
+        self._log("delete_object", Key=Key)
+        self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None, page_size=2):
+        self._log("list_objects_v2", Prefix=Prefix, ContinuationToken=ContinuationToken)
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + page_size]
+        response = {"Contents": [{"Key": k} for k in page], "IsTruncated": start + page_size < len(keys)}
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + page_size)
+        return response
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self._log("generate_presigned_url", Params=Params, ExpiresIn=ExpiresIn)
+        return f"https://bucket.example/{Params['Key']}?expires={ExpiresIn}"
+
+    def count(self, name):
+        return sum(1 for call, _ in self.calls if call == name)
+
+
+@pytest.fixture
+def s3(tmp_path):
+    client = StubS3Client()
+    driver = S3StorageDriver("oscan", prefix="prod", client=client, cache_dir=str(tmp_path / "cache"))
+    return ArtifactStore("instance/store", driver=driver), client
+
+
+# ─────────────────────────────────────────────
+#  LOCAL
+# ─────────────────────────────────────────────
+
+def test_incomplete_driver_fails_on_creation():
+    class ReadOnlyDriver(StorageDriver):
+        def exists(self, key):
+            return False
+
+    with pytest.raises(TypeError):
+        ReadOnlyDriver()
+
+
+def test_local_put_is_content_addressed(tmp_path):
+    store = ArtifactStore("instance/store", driver=LocalStorageDriver(str(tmp_path)))
+
+    path = store.put(b"scan bytes", "JPG")
+    assert path.startswith("instance/store/") and path.endswith(".jpg")
+    assert store.put(b"scan bytes", ".jpg") == path
+    assert store.put_stream(io.BytesIO(b"scan bytes"), ".jpg") == path
+    assert store.get(path) == b"scan bytes"
+    assert store.read_range(path, 5, 8) == b"byte"
+    assert store.url(path) is None
+    assert not store.contains("instance/store/../app.py")
+
+
+def test_local_delete_prefix(tmp_path):
+    store = ArtifactStore("instance/store", driver=LocalStorageDriver(str(tmp_path)))
+    kept = store.write("instance/store/reports/2/v1.pdf", b"other record")
+    for version in ("v1", "v2"):
+        store.write(f"instance/store/reports/1/{version}.pdf", b"%PDF")
+
+    store.delete("instance/store/reports/1/v1.pdf")
+    store.delete("instance/store/reports/1/v1.pdf")
+    assert sorted(store.driver.list("instance/store/reports/1/")) == ["instance/store/reports/1/v2.pdf"]
+
+    store.delete_prefix("instance/store/reports/1")
+    assert not os.path.exists(tmp_path / "instance" / "store" / "reports" / "1")
+    assert store.exists(kept)
+    with pytest.raises(ValueError):
+        store.delete_prefix("static")
+
+
+# ─────────────────────────────────────────────
+#  S3
+# ─────────────────────────────────────────────
+
+def test_s3_small_put_is_one_request(s3):
+    store, client = s3
+
+    path = store.put(b"%PDF-1.4 report", ".pdf")
+    assert ("oscan", f"prod/{path}") in client.objects
+    assert client.count("put_object") == 1 and client.count("create_multipart_upload") == 0
+
+    # Same content again: found by head_object, not uploaded twice
+    store.put(b"%PDF-1.4 report", ".pdf")
+    assert client.count("put_object") == 1
+    assert store.exists(path) and store.size(path) == 15
+
+
+def test_s3_large_put_is_multipart(s3):
+    store, client = s3
+    part = store.driver.part_size
+    data = os.urandom(2 * part + 1234)
+
+    path = store.put_stream(io.BytesIO(data), ".bin")
+    sizes = [kw["size"] for call, kw in client.calls if call == "upload_part"]
+    assert sizes == [part, part, 1234]
+    assert client.count("complete_multipart_upload") == 1
+    assert store.get(path) == data
+
+
+def test_s3_failed_part_aborts_upload(tmp_path):
+    client = StubS3Client(fail_part=2)
+    store = ArtifactStore("instance/store", driver=S3StorageDriver("oscan", client=client, cache_dir=str(tmp_path)))
+
+    with pytest.raises(ClientError):
+        store.put(os.urandom(2 * S3StorageDriver.MIN_PART_SIZE), ".bin")
+    assert client.count("abort_multipart_upload") == 1
+    assert not client.objects and not client.uploads
+
+
+def test_s3_missing_object(s3):
+    store, client = s3
+
+    assert not store.exists("instance/store/ab/cd/missing.jpg")
+    with pytest.raises(FileNotFoundError):
+        store.size("instance/store/ab/cd/missing.jpg")
+
+
+def test_s3_read_range(s3):
+    store, client = s3
+    path = store.put(b"0123456789", ".txt")
+
+    assert store.read_range(path, 2, 5) == b"2345"
+    assert store.read_range(path, 7) == b"789"
+    ranges = [kw["Range"] for call, kw in client.calls if call == "get_object"]
+    assert ranges == ["bytes=2-5", "bytes=7-"]
+
+
+def test_s3_delete_prefix(s3):
+    store, client = s3
+    kept = store.write("instance/store/reports/2/v1.pdf", b"other record")
+    for version in ("v1", "v2", "v3"):
+        store.write(f"instance/store/reports/1/{version}.pdf", b"%PDF")
+
+    # Listed across pages, keys returned without the bucket prefix
+    assert sorted(store.driver.list("instance/store/reports/1/")) == [
+        f"instance/store/reports/1/v{i}.pdf" for i in (1, 2, 3)
+    ]
+    store.delete_prefix("instance/store/reports/1/")
+    assert not store.driver.list("instance/store/reports/1/")
+    assert store.exists(kept) and client.count("delete_object") == 3
+
+
+def test_s3_presigned_url(s3):
+    store, client = s3
+    path = store.put(b"%PDF-1.4 report", ".pdf")
+
+    url = store.url(path, expires_in=60, content_type="application/pdf", download_name="report_1.pdf")
+    assert url == f"https://bucket.example/prod/{path}?expires=60"
+    params = client.calls[-1][1]["Params"]
+    assert params["ResponseContentType"] == "application/pdf"
+    assert params["ResponseContentDisposition"] == 'attachment; filename="report_1.pdf"'
+
+
+def test_s3_local_copies_are_bounded(tmp_path):
+    client = StubS3Client()
+    driver = S3StorageDriver("oscan", client=client, cache_dir=str(tmp_path), cache_max_bytes=2500)
+    store = ArtifactStore("instance/store", driver=driver)
+    paths = [store.put(bytes([i]) * 1000, ".jpg") for i in range(3)]
+
+    first = store.local_path(paths[0])
+    assert open(first, "rb").read() == bytes([0]) * 1000
+    assert store.local_path(paths[0]) == first and client.count("download_fileobj") == 1
+    # Make the first copy the oldest, so the third download evicts it
+    os.utime(first, (0, 0))
+    second = store.local_path(paths[1])
+    third = store.local_path(paths[2])
+
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
@@ -0,0 +1,115 @@
+"""
+test_inference_backends.py
+O-Scan Diagnostics — Inference Backend Tests
+The converted TFLite model must score like the Keras model it came from,
+within the TFLITE_TOLERANCE the app falls back to Keras beyond (1e-3).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+tf = pytest.importorskip("tensorflow")
+
+from inference_backends import (  # noqa: E402
+    InferenceBackend, KerasBackend, TFLiteBackend, convert_to_tflite, max_score_difference
+)
+
+TOLERANCE = 1e-3
+
+
+def fixed_batch(samples=4, seed=7):
+    return np.random.default_rng(seed).random((samples, 224, 224, 3), dtype=np.float32)
+
+
+@pytest.fixture(scope="module")
+def small_model():
+    """Same shape of network as the screening model (conv layers, sigmoid score), small enough to build here"""
+    tf.keras.utils.set_random_seed(0)
+    inputs = tf.keras.Input(shape=(224, 224, 3))
+    x = tf.keras.layers.Conv2D(8, 3, strides=2, activation='relu')(inputs)
+    x = tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu', name='last_conv')(x)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(1, activation='sigmoid')(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+def test_tflite_matches_keras(small_model):
+    keras_backend = KerasBackend(small_model)
+    tflite_backend = TFLiteBackend(model_content=convert_to_tflite(small_model))
+    img_batch = fixed_batch()
+
+    expected = keras_backend.predict(img_batch)
+    scores = tflite_backend.predict(img_batch)
+    assert scores.shape == expected.shape
+    np.testing.assert_allclose(scores, expected, atol=TOLERANCE, rtol=0)
+    assert max_score_difference(keras_backend, tflite_backend) <= TOLERANCE
+
+
+def test_tflite_file_round_trip(small_model, tmp_path):
+    path = str(tmp_path / "model.tflite")
+    convert_to_tflite(small_model, output_path=path)
+
+    keras_backend = KerasBackend(small_model)
+    tflite_backend = TFLiteBackend(model_path=path, num_threads=1)
+    img_batch = fixed_batch(samples=1)
+    np.testing.assert_allclose(
+        tflite_backend.predict(img_batch), keras_backend.predict(img_batch), atol=TOLERANCE, rtol=0
+    )
+
+
+def test_tflite_gradcam_comes_from_keras(small_model):
+    keras_backend = KerasBackend(small_model)
+    tflite_backend = TFLiteBackend(model_content=convert_to_tflite(small_model), gradcam_backend=keras_backend)
+    assert tflite_backend.supports_gradcam
+    assert not TFLiteBackend(model_content=convert_to_tflite(small_model)).supports_gradcam
+
+    img_batch = fixed_batch(samples=2)
+    scores, heatmaps = tflite_backend.predict_with_gradcam(img_batch)
+    np.testing.assert_allclose(scores, keras_backend.predict(img_batch), atol=TOLERANCE, rtol=0)
+    assert len(heatmaps) == 2
+
+
+def test_tflite_loads_gradcam_model_on_first_use(small_model):
+    loads = []
+
+    def load_keras():
+        loads.append(1)
+        return KerasBackend(small_model)
+
+    tflite_backend = TFLiteBackend(model_content=convert_to_tflite(small_model), gradcam_loader=load_keras)
+    img_batch = fixed_batch(samples=1)
+    tflite_backend.predict(img_batch)
+    assert tflite_backend.supports_gradcam and not loads
+
+    for _ in range(2):
+        _, heatmaps = tflite_backend.predict_with_gradcam(img_batch)
+        assert len(heatmaps) == 1
+    assert len(loads) == 1
+
+
+def test_backend_must_implement_predict():
+    class NoPredict(InferenceBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        NoPredict()
+
+
+def test_screening_model_parity():
+    model_path = os.path.join(ROOT, "oral_cancer_model.h5")
+    if not os.path.exists(model_path):
+        pytest.skip("oral_cancer_model.h5 is not present")
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    keras_backend = KerasBackend(model)
+    tflite_backend = TFLiteBackend(model_content=convert_to_tflite(model))
+    img_batch = fixed_batch(samples=2)
+    np.testing.assert_allclose(
+        tflite_backend.predict(img_batch), keras_backend.predict(img_batch), atol=TOLERANCE, rtol=0
+    )
@@ -0,0 +1,193 @@
+"""
+user_cache.py
+O-Scan Diagnostics — Session User Cache
+Flask-Login loads the signed-in user on every request, polled JSON endpoints
+included. This keeps a lightweight snapshot of each user (no password hash,
+no ORM session) per process for a short TTL, so most requests skip the
+database. The doctor list behind the screening and booking drop-downs is
+cached the same way. Routes that change a user invalidate its entry.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask_login import UserMixin
+
+
+# ─────────────────────────────────────────────
+#  SNAPSHOT
+# ─────────────────────────────────────────────
+
+class UserSnapshot(UserMixin):
+    """Read-only view of a User, safe to share between requests and threads."""
+
+    __slots__ = ("id", "username", "email", "role", "specialization")
+
+    def __init__(self, id, username, email, role, specialization=None):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+        self.specialization = specialization
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email, user.role, user.specialization)
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id} {self.role}>"
+
+
+# ─────────────────────────────────────────────
+#  CACHE
+# ─────────────────────────────────────────────
+
+class UserCache:
+    """
+    Thread-safe TTL + LRU cache of UserSnapshots keyed by user id.
+    `loader(user_id)` returns a User (or None) on a miss; unknown ids are
+    not cached, so a freshly registered account is seen straight away.
+    """
+
+    def __init__(self, loader, ttl_seconds=60, max_entries=4096):
+        self.loader = loader
+        self.ttl_seconds = max(0, int(ttl_seconds))
+        self.max_entries = max(1, int(max_entries))
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def get(self, user_id):
+        """Snapshot for `user_id`, or None if no such user exists."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                snapshot, expires_at = entry
+                if now < expires_at:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return snapshot
+                del self._entries[user_id]
+                self.expired += 1
+            self.misses += 1
+            generation = self._generation
+
+        user = self.loader(user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        if self.ttl_seconds:
+            with self._lock:
+                # An invalidation that raced the load wins; don't cache what we read
+                if generation != self._generation:
+                    return snapshot
+                self._entries[user_id] = (snapshot, now + self.ttl_seconds)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            }
+
+
+# ─────────────────────────────────────────────
+#  DOCTOR DIRECTORY
+# ─────────────────────────────────────────────
+
+DoctorEntry = namedtuple("DoctorEntry", ["id", "username", "specialization"])
+
+
+class DoctorDirectory:
+    """
+    The list of doctors patients pick from, cached per process for a TTL.
+    `loader()` returns (id, username, specialization) rows. `version` is a
+    hash of the list, usable as an ETag by clients that cache it.
+    """
+
+    def __init__(self, loader, ttl_seconds=300):
+        self.loader = loader
+        self.ttl_seconds = max(0, int(ttl_seconds))
+
+        self._doctors = None
+        self._version = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self):
+        """(doctors, version); `doctors` is a tuple of DoctorEntry."""
+        now = time.monotonic()
+        with self._lock:
+            if self._doctors is not None and now < self._expires_at:
+                self.hits += 1
+                return self._doctors, self._version
+            self.misses += 1
+            generation = self._generation
+
+        doctors = tuple(DoctorEntry(*row) for row in self.loader())
+        version = hashlib.sha256(json.dumps(doctors).encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            if generation == self._generation and self.ttl_seconds:
+                self._doctors, self._version = doctors, version
+                self._expires_at = now + self.ttl_seconds
+        return doctors, version
+
+    @property
+    def doctors(self):
+        return self.get()[0]
+
+    def invalidate(self):
+        with self._lock:
+            self._doctors = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "doctors": len(self._doctors) if self._doctors is not None else None,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            }